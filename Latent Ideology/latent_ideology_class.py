@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 from sklearn.decomposition import TruncatedSVD
-from sklearn.utils.extmath import randomized_svd
+from scipy import sparse
+from scipy.linalg import solve_triangular
+from scipy.sparse.linalg import LinearOperator, aslinearoperator, eigsh, svds
 
 class latent_ideology:
   """
@@ -21,6 +23,7 @@ class latent_ideology:
 
   def __init__(self, df):
     self.df = df
+    self._adjacency_cache = {} #adjacency matrices reused by apply_method, see _cached_adjacency()
 
   #from dataframe, return filtered pandas adjacency matrix 
   def make_adjacency(self, m = None ,n = 2, k=None, targets = 'target', sources= 'source', weight = False, weight_name = 'weight',filtered_df = False, detailed_lists = False, drop = None):
@@ -52,27 +55,38 @@ class latent_ideology:
     - **drop** : list (default = None).
             List of targets/sources to drop before applying the method.
     """
-    df = self.df.copy()
-    df['target'] = df[targets]
-    df['source'] = df[sources]
+    dfw, targets_info, sources_info, A, index, columns = self._build_adjacency(m=m, n=n, k=k, targets=targets, sources=sources, weight=weight, weight_name=weight_name, detailed_lists=detailed_lists, drop=drop)
+    final_data = pd.DataFrame(A.toarray(), index=index, columns=columns)
+
+    if filtered_df == True and detailed_lists == False:
+      return dfw, final_data
+    elif filtered_df == False and detailed_lists == False:
+      return final_data
+    elif filtered_df == True and detailed_lists == True:
+      return dfw, targets_info, sources_info, final_data
+    elif filtered_df == False and detailed_lists == True:
+      return targets_info, sources_info, final_data
+
+  #Body of make_adjacency(). The adjacency matrix is returned as a scipy csr matrix A along with its
+  #row (target) and column (source) labels, so that apply_method() can feed it to the SVD without densifying it.
+  #(with entries of the given dtype). targets_info and sources_info are None unless detailed_lists=True
+  def _build_adjacency(self, m, n, k, targets, sources, weight, weight_name, detailed_lists, drop, dtype=np.float64):
+    #Rename the relevant columns to their canonical names. Unrelated input columns already holding one of
+    #those names are dropped first (they would be overwritten anyway); every other column is kept
+    columns = {targets:'target', sources:'source'}
     if weight==True:
-      df['weight'] = df[weight_name]
+      columns[weight_name] = 'weight'
+    clashing = [name for name in columns.values() if name in self.df.columns and name not in columns]
+    df = self.df.drop(columns=clashing).rename(columns=columns)
     if m==None:
       m = len(df.target) 
     if k==None:
       k = 1e23 #enourmous number that resembles the non-filtering case
 
     #Drop them!
-    if drop!=None:
-      target_todrop = []
-      source_todrop = []
-      for obj in drop:
-        target_todrop.append(list(df[df.target == obj].index))
-        source_todrop.append(list(df[df.source == obj].index))
-      x1=sum(target_todrop, [])
-      x2=sum(source_todrop, [])
-      fulldrop = x1+x2
-      df = df.drop(fulldrop, axis=0).reset_index(drop=True).copy()
+    if drop is not None:
+      drop_set = set(drop)
+      df = df[~df.target.isin(drop_set) & ~df.source.isin(drop_set)].reset_index(drop=True)
 
 
     #Threshold 0: Interactions limit
@@ -81,55 +95,40 @@ class latent_ideology:
     interactions_count = df2.query('counter < @k').index
     df_th0 = df[df.target.isin(interactions_count)].copy()  
 
+    #Categorical labels: every groupby from here on hashes small integer codes instead of the labels themselves
+    target_dtype = df_th0.target.dtype
+    source_dtype = df_th0.source.dtype
+    df_th0['target'] = df_th0.target.astype('category')
+    df_th0['source'] = df_th0.source.astype('category')
+
     #Threshold 1: number of distinct sources interacting with each target
-    groups_dict_target = df_th0[['target','source']].groupby(by=['target']).groups #dict
-    keys_list = list(groups_dict_target.keys()) #users (keys)
-    sources = []
-    lengths = []
-    total_interactions = []
-    
-    for key in keys_list:
-      source_list_index = list(groups_dict_target[key]) #sources list for each target 
-      source_asocciated = []
-      for s in source_list_index:
-        source_asocciated.append(df.source[s])
-      total_interactions.append(len(source_list_index))
-      sources.append(list(set(source_asocciated)))
-      lengths.append(len(list(set(source_asocciated)))) #list of sources lenghts
-    data = {'target':keys_list, 'sources_associated':sources, 'total_distinct_sources':lengths, 'total_interactions':total_interactions}#new df
+    g = df_th0.groupby(by='target', observed=True)['source']
+    lengths = g.nunique() #list of sources lenghts
+    total_interactions = g.size().values
+    sources = [list(x) for x in g.unique()] #sources list for each target
+    data = {'target':lengths.index, 'sources_associated':sources, 'total_distinct_sources':lengths.values, 'total_interactions':total_interactions}#new df
     df3 = pd.DataFrame(data).sort_values(by=['total_distinct_sources'], ascending=False).reset_index(drop=True)
     df_targets_associated = df3.query("total_distinct_sources >= @n")
     targets_threshold_1 = list(df_targets_associated['target'])
     df_filtered_th1 = df_th0.query('(target == @targets_threshold_1)')
     
     #Threshold 2: number of sources
-    top_sources = df_filtered_th1[['target','source']].groupby('source').count().sort_values(by = 'target', ascending = False).head(m).index
+    top_sources = df_filtered_th1[['target','source']].groupby('source', observed=True).count().sort_values(by = 'target', ascending = False).head(m).index
     df_filtered_th1_th2 = df_filtered_th1[df_filtered_th1.source.isin(top_sources)].copy()
 
-    #Unique targets, sources
-    source_list = list(df_filtered_th1_th2.source.unique())
-    target_list = list(df_filtered_th1_th2.target.unique())
-
     if detailed_lists:
-      targets_info = df_targets_associated[df_targets_associated.target.isin(target_list)]
+      targets_info = df_targets_associated[df_targets_associated.target.isin(df_filtered_th1_th2.target.unique())]
 
     #Weights
     if weight == False:
-      #Lets add the weight of each interaction
-      w = []
-      df4 = pd.DataFrame()
-      for s in source_list:
-        df4['weight'] = df_filtered_th1_th2[df_filtered_th1_th2.source==s][['target','source']].groupby(by='target').source.count()
-        df4['source'] = s
-        w.append(df4)
-        df4 = pd.DataFrame()
-      dfw = pd.concat(w).fillna(0).sort_values('weight',ascending=False).groupby(by=['target','source']).sum().reset_index()
+      #Lets add the weight of each interaction (one hash pass over all target/source pairs)
+      dfw = df_filtered_th1_th2.groupby(by=['target','source'], observed=True).size().rename('weight').reset_index()
     else:
       dfw = df_filtered_th1_th2
 
     #Detailed source list
     if detailed_lists:
-      groups_dict = dfw[['source','target']].set_index('target').groupby(by=['source']).groups
+      groups_dict = dfw[['source','target']].set_index('target').groupby(by='source', observed=True).groups
       keys_list = list(groups_dict.keys()) #influencers (keys)
       targets_asoc = []
       lengths = []
@@ -142,24 +141,35 @@ class latent_ideology:
       sources_info = pd.DataFrame(data_new).sort_values(by=['total_distinct_targets'], ascending=False).reset_index(drop=True)
 
 
-    #Final matrix
-    source_col = []
-    for s in source_list:
-      df_aux = dfw[dfw.source == s][['target','weight']].set_index('target') #column users & weights
-      df_aux.columns = [s] #rename weight --> influencer asociated 
-      source_col.append(df_aux) #list of targets associated with source
+    #Final matrix: built straight from the (target, source, weight) triples, repeated pairs are summed up
+    #(rows sorted by target, columns in order of first appearance of each source, as in the filtered dataframe)
+    t_codes, t_labels = pd.factorize(dfw.target, sort=True)
+    s_labels = pd.Index(np.asarray(df_filtered_th1_th2.source.unique()))
+    s_codes = s_labels.get_indexer(dfw.source)
+    A = sparse.coo_matrix((dfw.weight.to_numpy(dtype=dtype), (t_codes, s_codes)), shape=(len(t_labels), len(s_labels))).tocsr()
+    index = pd.Index(t_labels, name='target').astype(target_dtype) #back to the input labels
+    columns = pd.Index(s_labels).astype(source_dtype)
 
-    final_data = pd.concat(source_col).fillna(0).groupby('target').sum()
-
-    if filtered_df == True and detailed_lists == False:
-      return dfw, final_data
-    elif filtered_df == False and detailed_lists == False:
-      return final_data
-    elif filtered_df == True and detailed_lists == True:
-      return dfw, targets_info, sources_info, final_data
-    elif filtered_df == False and detailed_lists == True:
-      return targets_info, sources_info, final_data
-    
+    #The categoricals are internal only: outputs go back to the input dtypes
+    dfw = dfw.astype({'target':target_dtype, 'source':source_dtype})
+    if detailed_lists:
+      targets_info = targets_info.astype({'target':target_dtype})
+    else:
+      targets_info = sources_info = None
+
+    return dfw, targets_info, sources_info, A, index, columns
+
+  #_build_adjacency() memoized on its parameters, keeping the last 8 results. The matrix is stored as float32, ready for the SVD.
+  #The key holds the identity and shape of self.df, so assigning a new dataframe to self.df invalidates it
+  #(in-place edits of self.df are not detected: create a new latent_ideology object after those)
+  def _cached_adjacency(self, drop=None, **kwargs):
+    key = (id(self.df), self.df.shape, None if drop is None else tuple(drop)) + tuple(sorted(kwargs.items()))
+    if key not in self._adjacency_cache:
+      if len(self._adjacency_cache) >= 8:
+        self._adjacency_cache.pop(next(iter(self._adjacency_cache))) #oldest entry
+      #self.df is stored along with the result so that its id() cannot be reused by another dataframe
+      self._adjacency_cache[key] = (self.df, self._build_adjacency(drop=drop, dtype=np.float32, **kwargs))
+    return self._adjacency_cache[key][1]
 
   #Use the correpondence analysis method to calculate the scores of a given adjacency matrix in the rows projection
   def calculate_scores(self, A, dimension = 1):
@@ -177,57 +187,149 @@ class latent_ideology:
   
     This method is further discussed in [1] and [2].
     ## Parameters
-    -  **A** : numpy matrix.
-            Weighted adjacency matrix.
+    -  **A** : numpy matrix or scipy sparse matrix.
+            Weighted adjacency matrix. Sparse inputs are never densified: the SVD is computed
+            through matrix-vector products, which is much faster for large adjacency matrices.
+            A float32 matrix is kept in single precision (half the memory traffic); sums and singular
+            vectors are still accumulated in double precision. The [-1, 1] scaling hides the remaining error.
     -  **dimension** : int (default = 1).
             To how many dimensions shall the truncated SVD method reduce the input matrix A. 
             This is equivalent the number of principal components considered
             when truncating the SVD method.
     """
 
-    P = (1/np.sum(A))*A #Nomalized natrix
+    #Truncated SVD
+    U, _, r2, _ = self._ca_svd(A, dimension)
+
+    #scores matrix, scaled betweeen -1 and 1 each dimension
+    scores = self._rescale(r2[:, None] * U)
+    if dimension > 1:
+      return list(scores.T) #one array of scores per dimension
+    return scores
+
+  #Normalize and standardize A, then return its truncated SVD (U, V) along with the row/column scalings r2, c2.
+  #V is only computed when right=True
+  def _ca_svd(self, A, dimension, right=False):
+    if sparse.issparse(A):
+      A = A.tocsr() #lil/dok/coo inputs are coerced, csr is what the matvecs need
+      dtype = np.result_type(A.dtype, np.float32) #float32 stays float32, integers go to float64
+      P = A.astype(dtype, copy=False) * dtype.type(1/A.sum(dtype=np.float64)) #Nomalized natrix (still sparse)
+      r = np.asarray(P.sum(axis=1, dtype=np.float64)).ravel() #rows
+      c = np.asarray(P.sum(axis=0, dtype=np.float64)).ravel() #columns
+    else:
+      P = np.multiply(A, 1/np.sum(A, dtype=np.float64), dtype=np.result_type(A, np.float32)) #Nomalized natrix (a new buffer, the input A is left untouched)
 
-    #Defining needings for standardizing
-    n_col = np.shape(P)[1]
-    n_row = np.shape(P)[0]
-    r = np.matmul(P, np.ones((n_col,))) #rows
-    c = np.matmul(np.ones((n_row,)), P) #columns
+      #Defining needings for standardizing
+      n_col = np.shape(P)[1]
+      n_row = np.shape(P)[0]
+      r = np.matmul(P, np.ones((n_col,))) #rows
+      c = np.matmul(np.ones((n_row,)), P) #columns
     r2 = r**(-0.5)
     c2 = c**(-0.5)
-    Dr2 = np.diag(r2)
-    Dc2 = np.diag(c2)
-    r_t = np.array([r]).transpose()
-    c_new = np.array([c])
 
-    #Standardized residuals
-    S = np.matmul(np.matmul(Dr2, P - np.matmul(r_t,c_new)),Dc2)
-
-    if dimension > 1:
-      #Truncated SVD
-      U, sig, Vt = randomized_svd(S, n_components=dimension, n_iter=5, random_state=None)
-      X_dim1 = np.matmul(Dr2,U) #scores matrix
-      scores = []
-      for i in range(dimension):
-        #scaling betweeen -1 and 1 each dimension
-        scores.append((-1 + 2 * (X_dim1[:,i]-np.min(X_dim1[:,i]))/np.ptp(X_dim1[:,i]))) #scaled
+    if sparse.issparse(P):
+      #Standardized residuals as an implicit operator: P is never densified
+      S = self._residuals_operator(P, r, c, r2, c2)
     else:
-      #Truncated SVD
-      U, sig, Vt = randomized_svd(S, n_components=1, n_iter=5, random_state=None)
-      
-      #scores
-      X_dim1 = np.matmul(Dr2,U) #scores matrix
-      scores = (-1 + 2 * (X_dim1-np.min(X_dim1))/np.ptp(X_dim1)) #scaled
-    
-    return scores
+      #Standardized residuals (computed in place over P, diagonal scalings applied by broadcasting)
+      S = P
+      S -= np.outer(r, c)
+      S *= r2[:, None]
+      S *= c2[None, :]
+
+    U, V = self._truncated_svd(S, dimension, right=right)
+    return U, V, r2, c2
+
+  #Scale each column of scores between -1 and 1
+  def _rescale(self, X):
+    mn = X.min(axis=0)
+    mx = X.max(axis=0)
+    return -1 + 2 * (X-mn)/(mx-mn)
+
+  #Standardized residuals Dr^(-1/2) (P - r c^T) Dc^(-1/2) of a sparse matrix P, applied without materializing them
+  def _residuals_operator(self, P, r, c, r2, c2):
+    def matmat(X):
+      Y = c2[:, None] * X
+      return r2[:, None] * (P @ Y - np.outer(r, c @ Y))
+
+    def rmatmat(X):
+      Y = r2[:, None] * X
+      return c2[:, None] * (P.T @ Y - np.outer(c, r @ Y))
+
+    return LinearOperator(P.shape, dtype=np.float64,
+                          matvec=lambda x: matmat(np.reshape(x, (-1, 1))).ravel(),
+                          rmatvec=lambda x: rmatmat(np.reshape(x, (-1, 1))).ravel(),
+                          matmat=matmat, rmatmat=rmatmat)
+
+  #Left (and, if right=True, right) singular vectors associated with the 'dimension' largest singular values of S.
+  #When right=False, V is returned as None and is not formed whenever the solver allows it
+  def _truncated_svd(self, S, dimension, right=False):
+    if dimension == 1:
+      return self._flip_signs(*self._leading_singular_pair(S, right=right))
+    if isinstance(S, LinearOperator):
+      U, sig, Vt = svds(S, k=dimension, return_singular_vectors=True if right else 'u')
+      order = np.argsort(sig)[::-1] #svds sorts the singular values in ascending order
+      return self._flip_signs(U[:, order], Vt[order].T if right else None)
+    U, sig, Vt = self._fast_rsvd(S, dimension, n_iter=5)
+    return self._flip_signs(U, Vt.T if right else None)
+
+  #Singular vectors are only defined up to a sign: flip each column of U so that its largest-magnitude entry
+  #is positive (and V along with it), so that the scores do not swap sides between identical calls
+  def _flip_signs(self, U, V=None):
+    signs = np.sign(U[np.argmax(np.abs(U), axis=0), np.arange(U.shape[1])])
+    signs[signs == 0] = 1
+    U = U * signs
+    if V is not None:
+      V = V * signs
+    return U, V
+
+  #Randomized SVD (Halko et al.) of a dense matrix, orthonormalizing the tall-thin sample matrices with
+  #Cholesky-QR (a Gram matrix, a Cholesky factor and a triangular solve) instead of a Householder QR
+  def _fast_rsvd(self, S, k, n_oversamples=10, n_iter=5):
+    #The residuals of a correspondence analysis have rank min(S.shape)-1 at most: more samples than that
+    #would make the Gram matrices singular
+    n_samples = max(k, min(k + n_oversamples, min(S.shape) - 1))
+    Y = self._cholesky_qr(S @ np.random.default_rng().standard_normal((S.shape[1], n_samples)))
+    for _ in range(n_iter):
+      Y = self._cholesky_qr(S @ (S.T @ Y)) #cheap enough to orthonormalize every iteration, which keeps the accuracy of a QR-based sampler
+    Q = self._cholesky_qr(Y) #second pass, to recover orthogonality lost to rounding
+    Uh, sig, Vt = np.linalg.svd((S.T @ Q).T, full_matrices=False)
+    return Q @ Uh[:, :k], sig[:k], Vt[:k]
+
+  #Orthonormal basis of the columns of a tall-thin Y, falling back to QR if Y^T Y is numerically singular
+  def _cholesky_qr(self, Y):
+    try:
+      L = np.linalg.cholesky(Y.T @ Y)
+    except np.linalg.LinAlgError:
+      return np.linalg.qr(Y)[0]
+    return solve_triangular(L, Y.T, lower=True).T
+
+  #Leading singular vectors of S from the Lanczos eigenvector of S S^T (or S^T S, whichever is smaller).
+  #The product is never formed: each iteration costs one product with S and one with S^T.
+  #The other singular vector follows from u = S v / sigma (or v = S^T u / sigma)
+  def _leading_singular_pair(self, S, right=False):
+    S = aslinearoperator(S)
+    n_row, n_col = S.shape
+    if n_row <= n_col:
+      SSt = LinearOperator((n_row, n_row), matvec=lambda x: S.matvec(S.rmatvec(x)), dtype=np.float64)
+      w, U = eigsh(SSt, k=1, which='LM')
+      V = S.rmatvec(U[:, 0])[:, None] / np.sqrt(w[0]) if right else None
+    else:
+      StS = LinearOperator((n_col, n_col), matvec=lambda x: S.rmatvec(S.matvec(x)), dtype=np.float64)
+      w, V = eigsh(StS, k=1, which='LM')
+      U = S.matvec(V[:, 0])[:, None] / np.sqrt(w[0])
+      V = V if right else None
+    return U, V
 
 
   #Compute the scores for rows and columns using the built-it correspondence analysis method. 
-  #Here, sources scores are calculated transposing the adjacency matrix
+  #Here, sources scores are calculated transposing the adjacency matrix (i.e. from the right singular vectors)
   def apply_simplified_method(self, df_adjacency):
     """
     Apply the correspondence analysis method to calculate the row scores given an adjacency matrix.
     The column scores (or the score of the sources) are calculated by transposing the adjacency matrix
     and imposing the exact same treatment as with the original non-transposed adjacency matrix. 
+    Both projections come out of the same SVD, since transposing the matrix just swaps its singular vectors.
 
     ## Parameters
    -   **df_adjacency** : pandas dataframe. 
@@ -236,18 +338,20 @@ class latent_ideology:
 
     """
 
-    A = df_adjacency.to_numpy(dtype = int) #for row scores
-    B = df_adjacency.T.to_numpy(dtype = int) #for column scores
-    row_scores = self.calculate_scores(A)
-    col_scores = self.calculate_scores(B)
+    A = sparse.csr_matrix(df_adjacency.to_numpy(dtype = np.float32))
+
+    #The SVD of the transposed matrix is the same one with U and V swapped: a single SVD gives both projections
+    U, V, r2, c2 = self._ca_svd(A, 1, right=True)
+    row_scores = self._rescale(r2[:, None] * U)
+    col_scores = self._rescale(c2[:, None] * V)
 
     #DataFrame of targets (rows) scores
-    scores_list = [float(l) for l in row_scores]
+    scores_list = np.asarray(row_scores, dtype=np.float64).ravel()
     data_metodo = {'target':df_adjacency.index,'score':scores_list}
     df_scores_target = pd.DataFrame(data_metodo)
 
     #DataFrame of sources (columns) scores
-    scores_list = [float(l) for l in col_scores]
+    scores_list = np.asarray(col_scores, dtype=np.float64).ravel()
     data_metodo = {'source':df_adjacency.columns,'score':scores_list}
     df_scores_sources = pd.DataFrame(data_metodo)
 
@@ -288,19 +392,18 @@ class latent_ideology:
             Calculate the score of the sources by a weighted mean of the scores of the targets. If False, the scores are calculated by the
             non-weighted mean, as the bibliography indicates.       
 
+    OBS: The filtered adjacency matrix is cached, so repeated calls with the same filtering parameters
+    (e.g. only changing weighted_mean) skip make_adjacency(). If self.df is modified in place, create a new object.
+
     """
 
-    #Adjacency matrix & filtering
-    if detailed_lists:
-      df_filtered, targets_info, sources_info ,df_adjacency = self.make_adjacency(m=m,n=n,k=k,targets=targets, sources=sources, filtered_df=True, weight=weight, weight_name=weight_name, detailed_lists=detailed_lists, drop=drop)
-    else:
-      df_filtered, df_adjacency = self.make_adjacency(m=m,n=n,k=k,targets=targets, sources=sources, filtered_df=True, weight=weight, weight_name=weight_name, detailed_lists=detailed_lists, drop=drop)
+    #Adjacency matrix & filtering (reused if it was already built with the same parameters)
+    df_filtered, targets_info, sources_info, A, index, columns = self._cached_adjacency(m=m,n=n,k=k,targets=targets, sources=sources, weight=weight, weight_name=weight_name, detailed_lists=detailed_lists, drop=drop)
 
-    #DataFrame of targets (rows) scores
-    A = df_adjacency.to_numpy(dtype = int) #for row scores
+    #DataFrame of targets (rows) scores: the sparse adjacency matrix goes straight to the SVD
     row_scores = self.calculate_scores(A)
-    scores_list = [float(l) for l in row_scores]
-    data_metodo = {'target':df_adjacency.index,'score':scores_list}
+    scores_list = np.asarray(row_scores, dtype=np.float64).ravel()
+    data_metodo = {'target':index,'score':scores_list}
     df_scores_target = pd.DataFrame(data_metodo)
 
     #DataFrame of sources (columns) scores
@@ -309,49 +412,19 @@ class latent_ideology:
     df_final = df_final.reset_index(drop=True).copy()
 
     if weighted_mean:
-      groups_dict = df_final[['source','score','weight']].set_index('score').groupby(by=['source', 'weight']).groups
-
-      keys_list_sources = list(df_final[['source','score','weight']].set_index('score').groupby(by=['source']).groups.keys()) #sources
-      keys_list = list(groups_dict.keys()) #tuples
-
-      mean_scores_w = []
-      score_list_w = []
-      length_w = []
-      last_key = keys_list[0][0]
-      for key in keys_list:
-        if key[0] == last_key:
-          score_list_w.append(np.sum(list(groups_dict[key])) * key[1])
-          length_w.append(len(list(groups_dict[key])) * key[1])
-
-          last_key = key[0]
-        else:
-          mean_scores_w.append(np.sum(score_list_w)/np.sum(length_w))
+      #weighted mean score of each source: sum(weight*score)/sum(weight)
+      grouped = df_final.assign(weighted_score = df_final.score * df_final.weight).groupby(by='source', sort=False, observed=True)
+      mean_scores_w = grouped.weighted_score.sum() / grouped.weight.sum()
 
-          score_list_w = []
-          length_w = []
-          score_list_w.append(np.sum(list(groups_dict[key])) * key[1])
-          length_w.append(len(list(groups_dict[key])) * key[1])
-          last_key = key[0]
-
-        if key == keys_list[-1]: #last key
-          mean_scores_w.append(np.sum(score_list_w)/np.sum(length_w))
-
-
-      data_new = {'source':[str(key) for key in keys_list_sources], 'score':mean_scores_w} #Create dataframe
+      data_new = {'source':mean_scores_w.index.astype(str), 'score':mean_scores_w.values} #Create dataframe
       df_scores_source = pd.DataFrame(data_new).sort_values(by=['score'], ascending=False).reset_index(drop=True)
           
     else:
-      groups_dict = df_final[['source','score']].set_index('score').groupby(by=['source']).groups
-      keys_list = list(groups_dict.keys()) #los influencers (son keys)
-      mean_scores = []
-      for key in keys_list:
-        score_list = list(groups_dict[key]) #lista de scores
-        mean_scores.append(np.mean(score_list))
-
-      data_new = {'source':[str(key) for key in keys_list], 'score':mean_scores} #Create dataframe
-      df_scores_source = pd.DataFrame(data_new).sort_values(by=['score'], ascending=False).reset_index(drop=True)
+      df_scores_source = df_final.groupby(by='source', sort=False, observed=True, as_index=False)['score'].mean() #mean score of each source
+      df_scores_source['source'] = df_scores_source.source.astype(str)
+      df_scores_source = df_scores_source.sort_values(by=['score'], ascending=False).reset_index(drop=True)
 
     if detailed_lists:
-      return df_scores_target, df_scores_source, targets_info, sources_info
+      return df_scores_target, df_scores_source, targets_info.copy(), sources_info.copy() #the cached frames are never handed out
     else:
       return df_scores_target, df_scores_source
@@ -0,0 +1,168 @@
+import importlib.util
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import sparse
+
+_path = os.path.join(os.path.dirname(__file__), '..', 'Latent Ideology', 'latent_ideology_class.py')
+_spec = importlib.util.spec_from_file_location('latent_ideology_class', _path)
+_module = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(_module)
+latent_ideology = _module.latent_ideology
+
+
+def _interactions():
+  rng = np.random.default_rng(0)
+  t = rng.integers(0, 200, 3000)
+  s = (t % 3) * 8 + rng.integers(0, 10, 3000)
+  return pd.DataFrame({'target': ['u%d' % i for i in t], 'source': ['s%d' % i for i in s]})
+
+
+def test_apply_method_scores_are_stable_across_calls():
+  df = _interactions()
+  first_targets, first_sources = latent_ideology(df).apply_method()
+  second_targets, second_sources = latent_ideology(df).apply_method()
+  assert list(first_targets.target) == list(second_targets.target)
+  np.testing.assert_allclose(first_targets.score, second_targets.score, atol=1e-8)
+  assert list(first_sources.source) == list(second_sources.source)
+  np.testing.assert_allclose(first_sources.score, second_sources.score, atol=1e-8)
+
+
+def _block_adjacency():
+  #4 groups of targets mostly interacting with their own group of sources: well separated singular values
+  rng = np.random.default_rng(1)
+  sizes = [60, 40, 25, 15]
+  groups = np.repeat(np.arange(4), sizes)
+  return rng.poisson(np.where(groups[:, None] == np.arange(4)[None, :].repeat(5, axis=1), 6.0, 0.5)) + 0
+
+
+@pytest.mark.parametrize('to_matrix', [np.asarray, sparse.csr_matrix])
+def test_calculate_scores_signs_are_stable_across_calls(to_matrix):
+  A = to_matrix(_block_adjacency())
+  li = latent_ideology(pd.DataFrame())
+  first = li.calculate_scores(A, dimension=3)
+  for _ in range(10):
+    again = li.calculate_scores(A, dimension=3)
+    for x, y in zip(first, again):
+      np.testing.assert_allclose(x, y, atol=1e-3)
+
+
+def test_make_adjacency_ignores_unrelated_canonical_columns():
+  df = _interactions()
+  expected = latent_ideology(df).make_adjacency()
+  counts = df.groupby(['target', 'source']).size().rename('w').reset_index()
+
+  clashing = df.rename(columns={'target': 'user'}).assign(target='unrelated')
+  pd.testing.assert_frame_equal(latent_ideology(clashing).make_adjacency(targets='user'), expected)
+
+  clashing = counts.assign(weight=-1)
+  pd.testing.assert_frame_equal(latent_ideology(clashing).make_adjacency(weight=True, weight_name='w'), expected, check_dtype=False, check_like=True)
+
+
+def test_make_adjacency_outputs_keep_input_dtypes():
+  df = _interactions()
+  dfw, targets_info, sources_info, adjacency = latent_ideology(df).make_adjacency(m=10, filtered_df=True, detailed_lists=True)
+  assert dfw.target.dtype == df.target.dtype
+  assert dfw.source.dtype == df.source.dtype
+  assert targets_info.target.dtype == df.target.dtype
+  assert (adjacency.dtypes == np.float64).all()
+
+
+def test_apply_method_matches_simplified_row_scores():
+  df = _interactions()
+  li = latent_ideology(df)
+  scores_target, scores_source, targets_info, sources_info = li.apply_method(m=10, detailed_lists=True)
+  simplified_target, _ = li.apply_simplified_method(li.make_adjacency(m=10))
+  assert list(scores_target.target) == list(simplified_target.target)
+  np.testing.assert_allclose(scores_target.score, simplified_target.score, atol=1e-4)
+  assert set(scores_source.source) == set(sources_info.source)
+
+
+def test_apply_method_detailed_lists_are_not_shared_with_the_cache():
+  li = latent_ideology(_interactions())
+  _, _, targets_info, sources_info = li.apply_method(m=10, detailed_lists=True)
+  expected_targets, expected_sources = targets_info.copy(), sources_info.copy()
+  targets_info['extra'] = 1
+  sources_info.sort_values('source', inplace=True)
+  _, _, targets_info, sources_info = li.apply_method(m=10, detailed_lists=True)
+  pd.testing.assert_frame_equal(targets_info, expected_targets)
+  pd.testing.assert_frame_equal(sources_info, expected_sources)
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+def test_sparse_normalized_matrix_keeps_the_input_precision(dtype):
+  li = latent_ideology(pd.DataFrame())
+  seen = []
+  residuals_operator = li._residuals_operator
+  def spy(P, *args):
+    seen.append(P.dtype)
+    return residuals_operator(P, *args)
+  li._residuals_operator = spy
+  li.calculate_scores(sparse.csr_matrix(_block_adjacency().astype(dtype)))
+  assert seen == [np.dtype(dtype)]
+
+
+def test_apply_method_caches_a_float32_adjacency_matrix():
+  li = latent_ideology(_interactions())
+  li.apply_method()
+  (_, (_, _, _, A, _, _)), = li._adjacency_cache.values()
+  assert A.dtype == np.float32
+
+
+def test_make_adjacency_filtered_df_keeps_extra_columns():
+  counts = _interactions().groupby(['target', 'source']).size().rename('w').reset_index()
+  df = counts.rename(columns={'target': 'user', 'source': 'page'}).assign(ts=1)
+  dfw, _ = latent_ideology(df).make_adjacency(targets='user', sources='page', weight=True, weight_name='w', filtered_df=True)
+  assert set(dfw.columns) == {'target', 'source', 'weight', 'ts'}
+
+
+def test_make_adjacency_columns_follow_first_appearance_of_sources():
+  df = _interactions()
+  adjacency = latent_ideology(df).make_adjacency(n=1)
+  assert list(adjacency.columns) == list(df.source.unique())
+  assert list(adjacency.index) == sorted(df.target.unique())
+
+
+def _weighted_interactions():
+  return pd.DataFrame({'target': ['u1', 'u1', 'u2', 'u2', 'u3', 'u3', 'u3', 'u4', 'u4', 'u5', 'u5'],
+                       'source': ['a', 'b', 'a', 'c', 'b', 'c', 'd', 'a', 'd', 'c', 'd'],
+                       'weight': [3, 1, 2, 5, 1, 1, 4, 6, 1, 2, 7]})
+
+
+@pytest.mark.parametrize('weighted_mean', [False, True])
+def test_apply_method_source_scores_are_means_of_target_scores(weighted_mean):
+  df = _weighted_interactions()
+  scores_target, scores_source = latent_ideology(df).apply_method(weight=True, weighted_mean=weighted_mean)
+  target_score = dict(zip(scores_target.target, scores_target.score))
+  for source, score in zip(scores_source.source, scores_source.score):
+    rows = df[df.source == source]
+    w = rows.weight.to_numpy() if weighted_mean else np.ones(len(rows))
+    expected = sum(wi * target_score[t] for wi, t in zip(w, rows.target)) / w.sum()
+    assert score == pytest.approx(expected)
+  assert list(scores_source.score) == sorted(scores_source.score, reverse=True)
+
+
+def test_apply_method_weighted_mean_does_not_depend_on_row_order():
+  df = _weighted_interactions()
+  _, expected = latent_ideology(df).apply_method(weight=True, weighted_mean=True)
+  _, shuffled = latent_ideology(df.sample(frac=1, random_state=3)).apply_method(weight=True, weighted_mean=True)
+  pd.testing.assert_frame_equal(shuffled.set_index('source').sort_index(), expected.set_index('source').sort_index(), atol=1e-8)
+
+
+def test_make_adjacency_drop_removes_targets_and_sources():
+  df = _weighted_interactions()
+  dropped = latent_ideology(df).make_adjacency(weight=True, drop=['u2', 'd'])
+  expected = latent_ideology(df[(df.target != 'u2') & (df.source != 'd')]).make_adjacency(weight=True)
+  pd.testing.assert_frame_equal(dropped, expected)
+  assert 'u2' not in dropped.index and 'd' not in dropped.columns
+
+
+def test_fast_rsvd_does_not_fall_back_to_householder_qr(monkeypatch):
+  def qr(*args, **kwargs):
+    raise AssertionError('Cholesky-QR fell back to np.linalg.qr')
+  monkeypatch.setattr(np.linalg, 'qr', qr)
+  rng = np.random.default_rng(0)
+  latent_ideology(pd.DataFrame()).calculate_scores(rng.poisson(2, (200, 5)) + 0, dimension=3)
+  latent_ideology(pd.DataFrame()).calculate_scores(_block_adjacency(), dimension=3)